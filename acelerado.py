@@ -0,0 +1,279 @@
+import os
+import random
+import string
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+# =====================================================
+# 0. BACKEND OPCIONAL (NUMBA)
+# =====================================================
+
+# Sem numba (ou com BREAKER_NO_JIT=1 no ambiente) o hill-climbing usa o
+# código Python de sempre; com numba, o laço inteiro roda compilado e
+# devolve exatamente o mesmo resultado.
+JIT_AVAILABLE = njit is not None
+JIT_ENABLED = JIT_AVAILABLE and not os.environ.get("BREAKER_NO_JIT")
+
+ALPHABET = string.ascii_uppercase
+VOWELS = "AEIOU"
+
+def _code(c: str) -> int:
+    """
+    Letras viram 0..25 (as únicas que a chave troca); qualquer outro
+    caractere fica com um código próprio acima disso.
+    """
+    if c in ALPHABET:
+        return ord(c) - 65
+    return 26 + ord(c)
+
+# =====================================================
+# 1. MERSENNE TWISTER IGUAL AO DO CPYTHON
+# =====================================================
+
+# Para sortear exatamente os mesmos vizinhos que generate_neighbor, o
+# kernel continua a sequência do gerador a partir de getstate()
+# (random.sample e random.random reimplementados sobre o MT19937).
+
+def _genrand(mt, idx):
+    if idx[0] >= 624:
+        for kk in range(624):
+            y = (mt[kk] & 0x80000000) | (mt[(kk + 1) % 624] & 0x7fffffff)
+            v = mt[(kk + 397) % 624] ^ (y >> 1)
+            if y & 1:
+                v ^= 0x9908b0df
+            mt[kk] = v
+        idx[0] = 0
+    y = mt[idx[0]]
+    idx[0] += 1
+    y ^= y >> 11
+    y ^= (y << 7) & 0x9d2c5680
+    y ^= (y << 15) & 0xefc60000
+    y ^= y >> 18
+    return y
+
+def _random(mt, idx):
+    a = _genrand(mt, idx) >> 5
+    b = _genrand(mt, idx) >> 6
+    return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0)
+
+def _randbelow(mt, idx, n):
+    k = 0
+    while (n >> k) > 0:
+        k += 1
+    r = _genrand(mt, idx) >> (32 - k)
+    while r >= n:
+        r = _genrand(mt, idx) >> (32 - k)
+    return r
+
+def _sample_two(mt, idx, free):
+    """
+    random.sample(free, 2): lista auxiliar até 21 itens, conjunto acima.
+    """
+    n = len(free)
+    if n <= 21:
+        j0 = _randbelow(mt, idx, n)
+        j1 = _randbelow(mt, idx, n - 1)
+        # a lista auxiliar moveu o último item para a vaga de j0
+        return free[j0], free[n - 1] if j1 == j0 else free[j1]
+    j0 = _randbelow(mt, idx, n)
+    j1 = _randbelow(mt, idx, n)
+    while j1 == j0:
+        j1 = _randbelow(mt, idx, n)
+    return free[j0], free[j1]
+
+# =====================================================
+# 2. DECIFRAR + SCORE (MESMA CONTA DE score_text)
+# =====================================================
+
+def _score(codes, plain, letter_pos, other_pos, mapping,
+           word_codes, word_offsets, lang_words, bigrams, vowel_targets, is_vowel):
+    """
+    codes é o texto cifrado com um espaço de cada lado (o text_padded de
+    score_common_words). As posições de letras e de não-letras não mudam
+    com a chave, então só as letras são decifradas a cada chamada.
+    Devolve o maior score_text entre os idiomas.
+    """
+    n = len(codes)
+    n_vowels = 0
+    for p in letter_pos:
+        plain[p] = mapping[codes[p]]
+        n_vowels += is_vowel[plain[p]]
+    n_letters = len(letter_pos)
+
+    best = -np.inf
+    for lang in range(len(vowel_targets)):
+        # palavras comuns: ocorrências sem sobreposição, como str.count
+        s_words = 0.0
+        for w in range(lang_words[lang], lang_words[lang + 1]):
+            start, stop = word_offsets[w], word_offsets[w + 1]
+            size = stop - start
+            first = word_codes[start]
+            count = 0
+            next_free = 0
+            if first >= 26:
+                for p in other_pos:
+                    if p < next_free or p + size > n or plain[p] != first:
+                        continue
+                    k = 1
+                    while k < size and plain[p + k] == word_codes[start + k]:
+                        k += 1
+                    if k == size:
+                        count += 1
+                        next_free = p + size
+            else:
+                for p in range(next_free, n - size + 1):
+                    if p < next_free or plain[p] != first:
+                        continue
+                    k = 1
+                    while k < size and plain[p + k] == word_codes[start + k]:
+                        k += 1
+                    if k == size:
+                        count += 1
+                        next_free = p + size
+            s_words += count
+
+        # bigramas: pares de letras consecutivas, ignorando o resto
+        s_bigrams = 0.0
+        for i in range(n_letters - 1):
+            s_bigrams += bigrams[lang, plain[letter_pos[i]], plain[letter_pos[i + 1]]]
+
+        if n_letters == 0:
+            s_vowels = 0.0
+        else:
+            s_vowels = -abs(n_vowels / n_letters - vowel_targets[lang])
+
+        score = 10.0 * s_words + 1.0 * s_bigrams + 2.0 * s_vowels
+        if score > best:
+            best = score
+    return best
+
+# =====================================================
+# 3. LAÇO DE ANNEALING COMPILADO
+# =====================================================
+
+def _anneal_kernel(codes, letter_pos, other_pos, mapping, free, iterations, mt, idx,
+                   word_codes, word_offsets, lang_words, bigrams, vowel_targets, is_vowel):
+    """
+    Mesmo laço de quebra_substituicao.anneal com generate_neighbor, sobre
+    a chave em vetor (mapping: cifra -> claro, inverse: claro -> cifra).
+    """
+    plain = codes.copy()
+    inverse = np.empty(26, np.int64)
+    for c in range(26):
+        inverse[mapping[c]] = c
+
+    current_score = _score(codes, plain, letter_pos, other_pos, mapping, word_codes,
+                           word_offsets, lang_words, bigrams, vowel_targets, is_vowel)
+    best_mapping = mapping.copy()
+    best_score = current_score
+
+    for i in range(iterations):
+        a, b = -1, -1
+        if len(free) >= 2:
+            a, b = _sample_two(mt, idx, free)
+            ca, cb = inverse[a], inverse[b]
+            mapping[ca], mapping[cb] = b, a
+            inverse[a], inverse[b] = cb, ca
+
+        neighbor_score = _score(codes, plain, letter_pos, other_pos, mapping, word_codes,
+                                word_offsets, lang_words, bigrams, vowel_targets, is_vowel)
+        delta = neighbor_score - current_score
+
+        if delta > 0:
+            accept = True
+        else:
+            T = max(0.1, (iterations - i) / iterations)
+            accept = _random(mt, idx) < 0.05 * T
+
+        if accept:
+            current_score = neighbor_score
+            if current_score > best_score:
+                best_mapping[:] = mapping
+                best_score = current_score
+        elif a >= 0:
+            # desfaz a troca
+            ca, cb = inverse[a], inverse[b]
+            mapping[ca], mapping[cb] = b, a
+            inverse[a], inverse[b] = cb, ca
+
+    return best_mapping, best_score
+
+if JIT_AVAILABLE:
+    # nogil: buscas em threads diferentes rodam o kernel em paralelo
+    _genrand = njit(cache=True, nogil=True)(_genrand)
+    _random = njit(cache=True, nogil=True)(_random)
+    _randbelow = njit(cache=True, nogil=True)(_randbelow)
+    _sample_two = njit(cache=True, nogil=True)(_sample_two)
+    _score = njit(cache=True, nogil=True)(_score)
+    _anneal_kernel = njit(cache=True, nogil=True)(_anneal_kernel)
+
+# =====================================================
+# 4. PONTE COM O CÓDIGO PYTHON
+# =====================================================
+
+def compile_models(models) -> tuple:
+    """
+    Converte modelos de LANGUAGE_MODELS (palavras comuns, bigramas, alvo
+    de vogais) em vetores para o kernel. Retorna None se algum modelo
+    tiver palavra vazia (str.count teria outro significado).
+    """
+    words, offsets, lang_words = [], [0], [0]
+    bigrams = np.zeros((len(models), 26, 26))
+    for lang, model in enumerate(models):
+        for w in model["common_words"]:
+            if not w:
+                return None
+            words.extend(_code(c) for c in w)
+            offsets.append(len(words))
+        lang_words.append(len(offsets) - 1)
+        for bg, weight in model["bigrams"].items():
+            if len(bg) == 2 and bg[0] in ALPHABET and bg[1] in ALPHABET:
+                bigrams[lang, ord(bg[0]) - 65, ord(bg[1]) - 65] = weight
+    return (
+        np.array(words, np.int64),
+        np.array(offsets, np.int64),
+        np.array(lang_words, np.int64),
+        bigrams,
+        np.array([model["vowel_target"] for model in models], np.float64),
+        np.array([1 if l in VOWELS else 0 for l in ALPHABET], np.int64),
+    )
+
+def anneal_substitution(ciphertext: str, mapping: dict, models, iterations: int,
+                        free_plain: str = ALPHABET, rng=random):
+    """
+    Versão compilada de anneal(mapping, score_text(apply_mapping(...)), ...)
+    para uma chave completa (bijeção de 26 letras). Consome o gerador rng
+    (o módulo random ou um random.Random) exatamente como o laço em
+    Python e devolve o mesmo (melhor_mapping, melhor_score).
+    Retorna None quando o caso não é suportado, e o chamador segue pelo
+    caminho em Python.
+    """
+    if not JIT_ENABLED or sorted(mapping) != list(ALPHABET) \
+            or sorted(mapping.values()) != list(ALPHABET):
+        return None
+    tables = compile_models(models)
+    if tables is None:
+        return None
+
+    version, internal, gauss_next = rng.getstate()
+    mt = np.array(internal[:624], np.int64)
+    idx = np.array([internal[624]], np.int64)
+
+    padded = f" {ciphertext} "
+    codes = np.array([_code(c) for c in padded], np.int64)
+    letter_pos = np.array([p for p, c in enumerate(padded) if c in ALPHABET], np.int64)
+    other_pos = np.array([p for p, c in enumerate(padded) if c not in ALPHABET], np.int64)
+    key = np.array([ord(mapping[c]) - 65 for c in ALPHABET], np.int64)
+    free = np.array([ord(l) - 65 for l in free_plain], np.int64)
+
+    best_key, best_score = _anneal_kernel(codes, letter_pos, other_pos, key, free,
+                                          iterations, mt, idx, *tables)
+
+    rng.setstate((version, tuple(int(x) for x in mt) + (int(idx[0]),), gauss_next))
+    best_mapping = {c: chr(65 + best_key[ord(c) - 65]) for c in mapping}
+    return best_mapping, float(best_score)
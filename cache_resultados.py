@@ -0,0 +1,189 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from quebra_substituicao import ALPHABET, normalize_ciphertext
+
+# =====================================================
+# 1. NORMALIZAÇÃO E SERIALIZAÇÃO
+# =====================================================
+
+# Formato canônico das chaves guardadas:
+#   "substitution": dict cipher_letter -> plain_letter (mesmo do hill-climbing)
+#   "permutation":  lista de posições (mesmo do PermutationCipher)
+
+def normalize_for_cache(ciphertext: str, cipher_type: str) -> str:
+    """
+    Forma normalizada usada no hash. Na substituição só importam as
+    letras (e espaços); na permutação as posições importam, então só
+    ignoramos maiúsculas/minúsculas.
+    """
+    if cipher_type == "substitution":
+        return normalize_ciphertext(ciphertext)
+    return ciphertext.upper()
+
+def ciphertext_digest(ciphertext: str, cipher_type: str) -> str:
+    norm = normalize_for_cache(ciphertext, cipher_type)
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+def _dump_key(key) -> str:
+    return json.dumps(key, sort_keys=True, separators=(",", ":"))
+
+def _letters_count(text: str) -> int:
+    return sum(1 for c in text.upper() if c in ALPHABET)
+
+def _trusted(ciphertext: str, key, score: float, threshold: float, accept_fn=None) -> bool:
+    """
+    Critério para guardar/reaproveitar uma chave: score POR LETRA acima
+    de threshold e, se houver, confirmação de accept_fn(chave, score).
+    """
+    if score / max(1, _letters_count(ciphertext)) < threshold:
+        return False
+    return accept_fn is None or accept_fn(key, score)
+
+# =====================================================
+# 2. ARMAZÉM PERSISTENTE (SQLITE)
+# =====================================================
+
+class ResultStore:
+    """
+    Cache local de textos já quebrados e índice de chaves conhecidas.
+    - results:    hash do texto cifrado normalizado -> chave, texto claro, score
+    - known_keys: chaves recuperadas, ordenadas por uso recente
+    Pode ser compartilhado entre threads: uma única conexão, com cada
+    operação protegida por um lock (a busca em si roda fora dele).
+    """
+
+    def __init__(self, path="resultados.sqlite"):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                digest      TEXT NOT NULL,
+                cipher_type TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                plaintext   TEXT NOT NULL,
+                score       REAL NOT NULL,
+                created     REAL NOT NULL,
+                PRIMARY KEY (digest, cipher_type)
+            );
+            CREATE TABLE IF NOT EXISTS known_keys (
+                cipher_type TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                last_used   REAL NOT NULL,
+                hits        INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (cipher_type, key)
+            );
+            CREATE INDEX IF NOT EXISTS known_keys_recent
+                ON known_keys (cipher_type, last_used DESC);
+        """)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, ciphertext: str, cipher_type: str):
+        """
+        Retorna (chave, texto_claro, score) se o texto já foi quebrado,
+        senão None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT key, plaintext, score FROM results WHERE digest = ? AND cipher_type = ?",
+                (ciphertext_digest(ciphertext, cipher_type), cipher_type),
+            ).fetchone()
+        if row is None:
+            return None
+        key, plaintext, score = row
+        return json.loads(key), plaintext, score
+
+    def save(self, ciphertext: str, cipher_type: str, key, plaintext: str, score: float):
+        """
+        Guarda o resultado e registra a chave no índice de chaves conhecidas.
+        """
+        now = time.time()
+        dumped = _dump_key(key)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (ciphertext_digest(ciphertext, cipher_type), cipher_type, dumped,
+                 plaintext, float(score), now),
+            )
+            self.remember_key(cipher_type, key, now)
+
+    def remember_key(self, cipher_type: str, key, now: float = None):
+        if now is None:
+            now = time.time()
+        with self.lock:
+            self.conn.execute(
+                """INSERT INTO known_keys (cipher_type, key, last_used, hits) VALUES (?, ?, ?, 1)
+                   ON CONFLICT (cipher_type, key)
+                   DO UPDATE SET last_used = excluded.last_used, hits = hits + 1""",
+                (cipher_type, _dump_key(key), now),
+            )
+            self.conn.commit()
+
+    def recent_keys(self, cipher_type: str, limit: int = 20) -> list:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key FROM known_keys WHERE cipher_type = ? ORDER BY last_used DESC LIMIT ?",
+                (cipher_type, limit),
+            ).fetchall()
+        return [json.loads(k) for (k,) in rows]
+
+    def try_known_keys(self, ciphertext: str, cipher_type: str,
+                       decrypt_fn, score_fn,
+                       threshold: float, limit: int = 20, accept_fn=None):
+        """
+        Testa as chaves usadas mais recentemente antes de qualquer busca.
+        decrypt_fn(ciphertext, key) -> texto claro; score_fn(texto) -> score.
+        Aceita a melhor chave se o score POR LETRA passar de threshold e,
+        com accept_fn(chave, score), se o quebrador também a confirmar
+        (por exemplo, a permutação exige que nenhuma outra chave do mesmo
+        tamanho pontue mais).
+        Retorna (chave, texto_claro, score) ou None.
+        """
+        best = None
+        for key in self.recent_keys(cipher_type, limit):
+            plain = decrypt_fn(ciphertext, key)
+            score = score_fn(plain)
+            if not _trusted(ciphertext, key, score, threshold, accept_fn):
+                continue
+            if best is None or score > best[2]:
+                best = (key, plain, score)
+        if best is None:
+            return None
+        self.save(ciphertext, cipher_type, best[0], best[1], best[2])
+        return best
+
+    def get_or_break(self, ciphertext: str, cipher_type: str,
+                     decrypt_fn, score_fn, threshold: float, search_fn, accept_fn=None):
+        """
+        Fluxo comum dos quebradores:
+        cache exato -> chaves conhecidas -> busca completa (search_fn()).
+        search_fn devolve (chave, texto_claro, score) no formato canônico.
+        O resultado da busca só é guardado se passar pelo mesmo critério
+        das chaves conhecidas: uma quebra que falhou (orçamento pequeno,
+        idioma errado) não pode bloquear uma tentativa melhor depois.
+        """
+        hit = self.lookup(ciphertext, cipher_type)
+        if hit is not None:
+            return hit
+        hit = self.try_known_keys(ciphertext, cipher_type, decrypt_fn, score_fn, threshold,
+                                  accept_fn=accept_fn)
+        if hit is not None:
+            return hit
+        key, plaintext, score = search_fn()
+        if _trusted(ciphertext, key, score, threshold, accept_fn):
+            self.save(ciphertext, cipher_type, key, plaintext, score)
+        return key, plaintext, score
@@ -0,0 +1,63 @@
+import gzip
+import hashlib
+import json
+import os
+
+# =====================================================
+# 1. ARQUIVO DE CHECKPOINT (JSON COMPACTADO, ESCRITA ATÔMICA)
+# =====================================================
+
+def job_fingerprint(*parts) -> str:
+    """
+    Identifica o trabalho (texto cifrado + parâmetros) para não retomar
+    um checkpoint de outro job por engano.
+    """
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def save_checkpoint(path: str, kind: str, fingerprint: str, state: dict):
+    """
+    Grava o estado em JSON + gzip. Escreve num arquivo temporário e
+    troca com os.replace, então uma preempção no meio da escrita nunca
+    deixa um checkpoint corrompido.
+    """
+    payload = {"kind": kind, "fingerprint": fingerprint, "state": state}
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def load_checkpoint(path: str, kind: str, fingerprint: str):
+    """
+    Retorna o estado salvo, ou None se não houver checkpoint.
+    Levanta ValueError se o arquivo for de outro trabalho.
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("kind") != kind or payload.get("fingerprint") != fingerprint:
+        raise ValueError(f"checkpoint {path!r} belongs to a different job")
+    return payload["state"]
+
+def clear_checkpoint(path: str):
+    if path is not None and os.path.exists(path):
+        os.remove(path)
+
+# =====================================================
+# 2. ESTADO DO GERADOR ALEATÓRIO
+# =====================================================
+
+def rng_state_to_json(state) -> list:
+    """
+    random.getstate() -> lista serializável em JSON.
+    """
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+def rng_state_from_json(data) -> tuple:
+    """
+    Inverso de rng_state_to_json, pronto para random.setstate().
+    """
+    version, internal, gauss_next = data
+    return version, tuple(internal), gauss_next
@@ -0,0 +1,242 @@
+import atexit
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# =====================================================
+# 1. LISTA DE STRINGS EM MEMÓRIA COMPARTILHADA
+# =====================================================
+
+# Layout do bloco (inteiros nativos "I"):
+#   [n] [offset_0 ... offset_n] [bytes UTF-8 concatenados] [extra]
+# A string i ocupa data[offset_i:offset_(i+1)]; o trecho extra (alinhado
+# em _ITEM) fica à disposição das subclasses.
+
+_ITEM = array("I").itemsize
+
+class SharedStrings:
+    """
+    Lista imutável de strings num único bloco de shared_memory.
+    O processo dono cria o bloco (create); os workers só se anexam pelo
+    nome (attach), sem copiar nem desserializar nada.
+    """
+
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self._owner = owner
+        buf = shm.buf
+        count = buf[:_ITEM].cast("I")[0]
+        header = _ITEM * (count + 2)
+        self._offsets = buf[_ITEM:header].cast("I")
+        self._data = buf[header:]
+        self._views = [self._offsets, self._data]
+        self._closed = False
+
+    @staticmethod
+    def _aligned(size: int) -> int:
+        return -(-size // _ITEM) * _ITEM
+
+    def _extra(self):
+        """
+        View do trecho extra gravado por create(..., extra=...).
+        """
+        return self._data[self._aligned(self._offsets[-1]):]
+
+    @classmethod
+    def create(cls, strings, extra: bytes = b""):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = array("I", [len(encoded)])
+        total = 0
+        offsets.append(0)
+        for item in encoded:
+            total += len(item)
+            offsets.append(total)
+        header = offsets.tobytes()
+
+        extra_start = len(header) + cls._aligned(total)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, extra_start + len(extra)))
+        shm.buf[:len(header)] = header
+        shm.buf[len(header):len(header) + total] = b"".join(encoded)
+        shm.buf[extra_start:extra_start + len(extra)] = extra
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _raw(self, i: int) -> bytes:
+        return bytes(self._data[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        if not -len(self) <= i < len(self):
+            raise IndexError("shared string index out of range")
+        return self._raw(i % len(self)).decode("utf-8")
+
+    def _release(self):
+        if self._closed:
+            return
+        self._closed = True
+        # derivadas antes das views de que saíram
+        for view in reversed(self._views):
+            view.release()
+        self._shm.close()
+
+    def close(self):
+        """
+        Solta as views e fecha o bloco; o dono também o remove do sistema.
+        Chamar de novo não faz nada.
+        """
+        if self._closed:
+            return
+        self._release()
+        if self._owner:
+            self._shm.unlink()
+
+    def __del__(self):
+        # sem as views soltas, o SharedMemory levanta BufferError ao ser
+        # coletado; remover o bloco continua sendo papel de close()
+        if hasattr(self, "_closed"):
+            self._release()
+
+
+class SharedWordSet(SharedStrings):
+    """
+    Vocabulário sem repetição com uma tabela hash (endereçamento aberto,
+    crc32 das palavras) no trecho extra do bloco: 'in' custa um hash e
+    em geral uma comparação, então serve no lugar do set de palavras do
+    EnglishScorer sem que cada worker monte a própria cópia.
+    Trecho extra: [m] [slot_0 ... slot_(m-1)], com slot = índice + 1 da
+    palavra (0 = vazio) e m potência de 2 de pelo menos 2x o vocabulário.
+    """
+
+    def __init__(self, shm, owner=False):
+        super().__init__(shm, owner)
+        extra = self._extra()
+        size = extra[:_ITEM].cast("I")[0]
+        self._slots = extra[_ITEM:_ITEM * (size + 1)].cast("I")
+        self._mask = size - 1
+        self._views += [extra, self._slots]
+
+    @classmethod
+    def create(cls, words):
+        encoded = sorted(set(w.encode("utf-8") for w in words))
+        size = 2
+        while size < 2 * len(encoded):
+            size *= 2
+        slots = array("I", [0] * size)
+        for i, item in enumerate(encoded):
+            h = zlib.crc32(item) & (size - 1)
+            while slots[h]:
+                h = (h + 1) & (size - 1)
+            slots[h] = i + 1
+        return super().create([w.decode("utf-8") for w in encoded],
+                              extra=array("I", [size]).tobytes() + slots.tobytes())
+
+    def __contains__(self, word) -> bool:
+        target = word.encode("utf-8")
+        offsets, slots, mask = self._offsets, self._slots, self._mask
+        h = zlib.crc32(target) & mask
+        while True:
+            i = slots[h]
+            if not i:
+                return False
+            if self._data[offsets[i - 1]:offsets[i]] == target:
+                return True
+            h = (h + 1) & mask
+
+# =====================================================
+# 2. TABELAS DO POOL (LADO DO PROCESSO PRINCIPAL)
+# =====================================================
+
+class SharedTables:
+    """
+    Publica uma vez, para todo o pool, os textos cifrados já normalizados
+    e (opcionalmente) o vocabulário do EnglishScorer. As tarefas passam
+    só o índice do texto; handle() é o que vai para os workers.
+    As tabelas de score_text (palavras comuns, bigramas) são constantes
+    pequenas do módulo quebra_substituicao e não precisam ser publicadas.
+    """
+
+    def __init__(self, ciphertexts=(), words=None):
+        self.ciphertexts = SharedStrings.create(list(ciphertexts))
+        self.words = SharedWordSet.create(words) if words is not None else None
+
+    def handle(self) -> dict:
+        return {
+            "ciphertexts": self.ciphertexts.name,
+            "words": self.words.name if self.words is not None else None,
+        }
+
+    def close(self):
+        self.ciphertexts.close()
+        if self.words is not None:
+            self.words.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# =====================================================
+# 3. BOOTSTRAP DOS WORKERS
+# =====================================================
+
+_ATTACHED = {}
+_ATEXIT_REGISTERED = False
+
+def attach_tables(handle: dict):
+    """
+    Initializer dos workers: anexa os blocos publicados por SharedTables.
+    Chamar de novo troca as tabelas: os blocos anteriores são fechados.
+    """
+    global _ATEXIT_REGISTERED
+    if not _ATEXIT_REGISTERED:
+        atexit.register(detach_tables)
+        _ATEXIT_REGISTERED = True
+    detach_tables()
+    _ATTACHED["ciphertexts"] = SharedStrings.attach(handle["ciphertexts"])
+    if handle["words"] is not None:
+        _ATTACHED["words"] = SharedWordSet.attach(handle["words"])
+
+def detach_tables():
+    """
+    Solta os blocos anexados (sem removê-los: isso é papel do dono).
+    """
+    while _ATTACHED:
+        _, block = _ATTACHED.popitem()
+        block.close()
+
+def shared_ciphertext(index: int) -> str:
+    return _ATTACHED["ciphertexts"][index]
+
+def shared_words():
+    """
+    Vocabulário anexado neste processo, ou None fora de um pool.
+    """
+    return _ATTACHED.get("words")
+
+def _bootstrap(handle, initializer, initargs):
+    attach_tables(handle)
+    if initializer is not None:
+        initializer(*initargs)
+
+def worker_pool(tables: SharedTables, workers: int, initializer=None, initargs=()):
+    """
+    ProcessPoolExecutor cujos workers já nascem anexados às tabelas.
+    initializer/initargs rodam depois do attach (por exemplo, para
+    montar um EnglishScorer em cima de shared_words()).
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_bootstrap,
+        initargs=(tables.handle(), initializer, initargs),
+    )
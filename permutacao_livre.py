@@ -1,17 +1,36 @@
+import itertools
 import random
-import nltk
+import warnings
 
 try:
-    nltk.data.find("corpora/words")
-except LookupError:
-    nltk.download("words")
+    import numpy as np
+except ImportError:
+    np = None
 
-from nltk.corpus import words as nltk_words
+from quebra_substituicao import (LANGUAGE_MODELS, CRIB_PARTIAL_LIMIT, choose_languages, parse_crib,
+                                 crib_partial_keys, score_text_languages)
+from checkpoint import (
+    job_fingerprint, save_checkpoint, load_checkpoint, clear_checkpoint,
+    rng_state_to_json, rng_state_from_json,
+)
+
+
+def load_english_words():
+    import nltk
+
+    try:
+        nltk.data.find("corpora/words")
+    except LookupError:
+        nltk.download("words")
+
+    from nltk.corpus import words as nltk_words
+    return set(w.lower() for w in nltk_words.words())
 
 
 class EnglishScorer:
-    def __init__(self):
-        self.english_words = set(w.lower() for w in nltk_words.words())
+    def __init__(self, words=None):
+        # words: any container supporting `in` (e.g. a shared-memory word set)
+        self.english_words = words if words is not None else load_english_words()
         self.english_bigrams = [
             "th","he","in","er","an","re","on","at","en","nd",
             "ti","es","or","te","of","ed","is","it","al"
@@ -29,6 +48,53 @@ class EnglishScorer:
         return score
 
 
+class LanguageScorer:
+    def __init__(self, lang):
+        model = LANGUAGE_MODELS[lang]
+        self.lang = lang
+        self.words = set(w.strip().lower() for w in model["common_words"])
+        self.bigrams = set(bg.lower() for bg in model["bigrams"])
+
+    def score(self, text):
+        score = 0
+        text = text.lower()
+        for w in text.split():
+            if w in self.words:
+                score += 5
+        for i in range(len(text)-1):
+            if text[i:i+2] in self.bigrams:
+                score += 1
+        return score
+
+
+class MultiLanguageScorer:
+    # Scores every language in one pass (score_text_languages) from the same
+    # registry tables, so the max() compares scores on the same scale. The
+    # NLTK dictionary of EnglishScorer is not used here: with ~236k words
+    # against ~50 common words per language it would always favour EN.
+    def __init__(self, langs):
+        self.langs = list(dict.fromkeys(langs))
+
+    def score_all(self, text):
+        return score_text_languages(text.upper(), self.langs)
+
+    def score(self, text):
+        return max(self.score_all(text).values())
+
+
+def scorer_for_languages(langs, english_scorer=None):
+    langs = list(dict.fromkeys(langs))
+    if len(langs) > 1:
+        return MultiLanguageScorer(langs)
+    if langs[0] == "EN":
+        return english_scorer if english_scorer is not None else EnglishScorer()
+    return LanguageScorer(langs[0])
+
+
+def scorer_for_ciphertext(ciphertext, english_scorer=None):
+    return scorer_for_languages(choose_languages(ciphertext), english_scorer)
+
+
 class PermutationCipher:
     def __init__(self, key):
         self.key = self._normalize_key(list(key))
@@ -89,11 +155,30 @@ class SubstitutionCipher:
 
 
 class GeneticBreaker:
-    def __init__(self, scorer, population_size=200, mutation_rate=0.1, generations=300):
+    # score mínimo POR LETRA para aceitar uma chave conhecida do cache;
+    # numa transposição ele não basta (as letras continuam as do idioma),
+    # então a chave também passa por _is_best_permutation_key
+    known_key_threshold = 0.15
+    # até este tamanho (5! = 120 decifrações) a chave conhecida é comparada
+    # com todas as outras; acima, só com trocas e deslocamentos de colunas
+    exhaustive_key_size = 5
+
+    def __init__(self, scorer, population_size=200, mutation_rate=0.1, generations=300,
+                 engine="auto", seed=None, rng=None):
+        if engine not in ("auto", "numpy", "python"):
+            raise ValueError(f"unknown engine {engine!r}")
+        if engine == "numpy" and np is None:
+            raise ImportError("engine='numpy' requires NumPy")
         self.scorer = scorer
         self.population_size = population_size
         self.mutation_rate = mutation_rate
         self.generations = generations
+        self.engine = "numpy" if engine == "auto" and np is not None else engine
+        self.seed = seed
+        # own generator (no global random): breakers can run in parallel threads
+        if rng is None:
+            rng = random.Random(seed if seed is not None else random.getrandbits(64))
+        self.rng = rng
 
     def detect_permutation_block_size(self, ciphertext):
         best_size = 2
@@ -108,33 +193,68 @@ class GeneticBreaker:
                 best_size = size
         return best_size
 
+    def candidate_block_sizes(self, ciphertext, max_size=40):
+        # encrypt pads the last block, so the key size divides the length
+        sizes = [n for n in range(2, min(max_size, len(ciphertext)) + 1) if len(ciphertext) % n == 0]
+        detected = self.detect_permutation_block_size(ciphertext)
+        return sorted(set(sizes) | {detected})
+
+    def _is_best_permutation_key(self, ciphertext, key, score):
+        if len(key) not in self.candidate_block_sizes(ciphertext):
+            return False
+        return all(self.scorer.score(PermutationCipher(other).decrypt(ciphertext)) <= score
+                   for other in self._key_neighbours(key))
+
+    def _key_neighbours(self, key):
+        # every other key while n! stays small, then only the moves a wrong
+        # key rarely survives: swapping two columns or moving one elsewhere
+        n = len(key)
+        if n <= self.exhaustive_key_size:
+            for other in itertools.permutations(key):
+                if list(other) != list(key):
+                    yield list(other)
+            return
+        for i in range(n):
+            for j in range(i + 1, n):
+                other = list(key)
+                other[i], other[j] = other[j], other[i]
+                yield other
+        for i in range(n):
+            for j in range(n):
+                # moving next door is the same as a swap
+                if abs(i - j) > 1:
+                    other = list(key)
+                    other.insert(j, other.pop(i))
+                    yield other
+
     def generate_random_key(self, cipher_type, key_size=None):
         if cipher_type == "permutation":
             key = list(range(key_size))
-            random.shuffle(key)
+            self.rng.shuffle(key)
             return key
         elif cipher_type == "substitution":
             letters = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
             shuffled = letters[:]
-            random.shuffle(shuffled)
+            self.rng.shuffle(shuffled)
             return dict(zip(letters, shuffled))
 
     def mutate(self, key, cipher_type):
         if cipher_type == "permutation":
-            a, b = random.sample(range(len(key)), 2)
+            a, b = self.rng.sample(range(len(key)), 2)
             key[a], key[b] = key[b], key[a]
         elif cipher_type == "substitution":
-            a, b = random.sample(list(key.keys()), 2)
+            a, b = self.rng.sample(list(key.keys()), 2)
             key[a], key[b] = key[b], key[a]
         return key
 
     def crossover(self, k1, k2, cipher_type):
         if cipher_type == "permutation":
             size = len(k1)
-            a, b = sorted(random.sample(range(size), 2))
+            a, b = sorted(self.rng.sample(range(size), 2))
             child = [-1] * size
             child[a:b+1] = k1[a:b+1]
-            fill = [x for x in k2 if x not in child]
+            used = set(child[a:b+1])
+            fill = [x for x in k2 if x not in used]
             idx = 0
             for i in range(size):
                 if child[i] == -1:
@@ -144,7 +264,7 @@ class GeneticBreaker:
         elif cipher_type == "substitution":
             letters = list(k1.keys())
             size = len(letters)
-            a, b = sorted(random.sample(range(size), 2))
+            a, b = sorted(self.rng.sample(range(size), 2))
             child = {}
             for i in range(a, b+1):
                 child[letters[i]] = k1[letters[i]]
@@ -158,34 +278,337 @@ class GeneticBreaker:
                             break
             return child
 
-    def break_cipher(self, ciphertext, cipher_class):
+    def _to_canonical_key(self, key, cipher_type):
+        # cache guarda substituição como cipher_letter -> plain_letter
+        if cipher_type == "substitution":
+            return {v: k for k, v in key.items()}
+        return list(key)
+
+    def _from_canonical_key(self, key, cipher_type):
+        if cipher_type == "substitution":
+            return {v: k for k, v in key.items()}
+        return list(key)
+
+    def crib_partial_keys(self, ciphertext, cribs, cipher_type, key_size=None, limit=CRIB_PARTIAL_LIMIT):
+        # partial keys come lazily, whole-word alignments first, and the
+        # enumeration stops as soon as more than `limit` are known (with a warning)
+        text = ciphertext.upper()
+        if cipher_type == "substitution":
+            partials = crib_partial_keys(text, cribs, limit)
+            return [{p: c for c, p in partial.items()} for partial in partials]
+
+        # permutation: key[i] = j means cipher offset i of each block holds plain offset j
+        n = key_size
+        parsed = sorted((parse_crib(c) for c in cribs), key=lambda wp: (wp[1] is None, -len(wp[0])))
+
+        def plain_at(pos, inverse):
+            block, j = divmod(pos, n)
+            i = inverse.get(j)
+            if i is None or block*n + i >= len(text):
+                return None
+            return text[block*n + i]
+
+        def solve(ci, partial, inverse, placements):
+            if ci == len(parsed):
+                # spaces are transposed too: a crib's plaintext neighbours are
+                # known when the partial key already pins their columns
+                whole = all((start == 0 or plain_at(start - 1, inverse) == " ")
+                            and (end == len(text) or plain_at(end, inverse) == " ")
+                            for start, end in placements)
+                yield whole, dict(partial)
+                return
+            word, position = parsed[ci]
+            starts = [position] if position is not None else range(len(text) - len(word) + 1)
+            for start in starts:
+                if 0 <= start and start + len(word) <= len(text):
+                    placements.append((start, start + len(word)))
+                    yield from assign(ci, word, start, 0, partial, inverse, placements)
+                    placements.pop()
+
+        def assign(ci, word, start, t, partial, inverse, placements):
+            if t == len(word):
+                yield from solve(ci + 1, partial, inverse, placements)
+                return
+            block, j = divmod(start + t, n)
+            if j in inverse:
+                i = inverse[j]
+                if block*n + i < len(text) and text[block*n + i] == word[t]:
+                    yield from assign(ci, word, start, t + 1, partial, inverse, placements)
+                return
+            for i in range(n):
+                if i in partial or block*n + i >= len(text) or text[block*n + i] != word[t]:
+                    continue
+                partial[i] = j
+                inverse[j] = i
+                yield from assign(ci, word, start, t + 1, partial, inverse, placements)
+                del partial[i]
+                del inverse[j]
+
+        # whether a crib sits on a whole word is only known once its
+        # neighbours' columns are pinned, so without spaces nothing can be
+        # preferred and the first partial keys in text order are kept
+        prefer_words = " " in text
+        whole_words, others, seen = [], [], set()
+        truncated = False
+        for whole, partial in solve(0, {}, {}, []):
+            frozen = frozenset(partial.items())
+            if frozen in seen:
+                continue
+            seen.add(frozen)
+            (whole_words if prefer_words and whole else others).append(partial)
+            if limit is not None and (len(whole_words) > limit or
+                                      (not prefer_words and len(others) > limit)):
+                truncated = True
+                break
+        results = whole_words + others
+        if limit is not None and len(results) > limit:
+            truncated = True
+            results = results[:limit]
+        if truncated:
+            warnings.warn(f"more than {limit} partial keys match the cribs; "
+                          f"only the first {limit} (whole words first) are kept", RuntimeWarning)
+        return results
+
+    def crib_candidates(self, ciphertext, cribs, cipher_type, limit=CRIB_PARTIAL_LIMIT):
+        if cipher_type == "substitution":
+            return [(None, fixed) for fixed in self.crib_partial_keys(ciphertext, cribs, cipher_type, limit=limit)]
+        # the cribs choose the key size: every candidate size they fit, except
+        # multiples of a size already kept (same hypothesis, longer key)
+        candidates = []
+        sizes = []
+        for size in self.candidate_block_sizes(ciphertext):
+            if any(size % s == 0 for s in sizes):
+                continue
+            partials = self.crib_partial_keys(ciphertext, cribs, cipher_type, size, limit)
+            if partials:
+                sizes.append(size)
+                candidates.extend((size, fixed) for fixed in partials)
+        return candidates
+
+    def break_cipher(self, ciphertext, cipher_class, store=None,
+                     checkpoint_path=None, checkpoint_every=10, cribs=None):
         cipher_type = "substitution" if cipher_class == SubstitutionCipher else "permutation"
-        if cipher_type == "permutation":
-            key_size = self.detect_permutation_block_size(ciphertext)
-        else:
+        checkpoint = (checkpoint_path, checkpoint_every)
+        if store is None:
+            return self._search_with_cribs(ciphertext, cipher_class, cipher_type, checkpoint, cribs)
+
+        def decrypt(text, key):
+            return cipher_class(self._from_canonical_key(key, cipher_type)).decrypt(text)
+
+        def accept(key, score):
+            if cipher_type != "permutation":
+                return True
+            return self._is_best_permutation_key(ciphertext, key, score)
+
+        def search():
+            key = self._search_with_cribs(ciphertext, cipher_class, cipher_type, checkpoint, cribs)
+            plain = cipher_class(key).decrypt(ciphertext)
+            return self._to_canonical_key(key, cipher_type), plain, self.scorer.score(plain)
+
+        key, _, _ = store.get_or_break(
+            ciphertext, cipher_type,
+            decrypt_fn=decrypt,
+            score_fn=self.scorer.score,
+            threshold=self.known_key_threshold,
+            search_fn=search,
+            accept_fn=accept,
+        )
+        return self._from_canonical_key(key, cipher_type)
+
+    def _search_with_cribs(self, ciphertext, cipher_class, cipher_type, checkpoint, cribs):
+        if not cribs:
             key_size = None
-        population = [self.generate_random_key(cipher_type, key_size) for _ in range(self.population_size)]
+            if cipher_type == "permutation":
+                key_size = self.detect_permutation_block_size(ciphertext)
+            return self._search(ciphertext, cipher_class, cipher_type, checkpoint, key_size)
+
+        candidates = self.crib_candidates(ciphertext, cribs, cipher_type)
+        if not candidates:
+            raise ValueError("cribs do not match the ciphertext under any key")
+        checkpoint_path, checkpoint_every = checkpoint
         best_key = None
         best_score = float("-inf")
+        for i, (key_size, fixed) in enumerate(candidates):
+            # one GA per consistent partial key (each with its own checkpoint
+            # file): the cost grows with the number of candidates, and a key
+            # fully pinned by the cribs is scored without any GA
+            if checkpoint_path is not None and len(candidates) > 1:
+                checkpoint = (f"{checkpoint_path}.{i}", checkpoint_every)
+            key = self._search(ciphertext, cipher_class, cipher_type, checkpoint, key_size, fixed)
+            score = self.scorer.score(cipher_class(key).decrypt(ciphertext))
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _search(self, ciphertext, cipher_class, cipher_type, checkpoint=(None, 10),
+                key_size=None, fixed=None):
+        if fixed is not None:
+            slots, pool = self._layout(cipher_type, key_size, fixed)
+            if len(pool) < 2:
+                return self._decode(list(range(len(pool))), slots, pool, cipher_type, fixed)
+        if self.engine == "numpy":
+            return self._search_numpy(ciphertext, cipher_class, cipher_type, checkpoint, key_size, fixed)
+        checkpoint_path, checkpoint_every = checkpoint
+        fingerprint = job_fingerprint(ciphertext, cipher_type, self.population_size,
+                                      self.mutation_rate, self.generations,
+                                      sorted(fixed.items()) if fixed else None)
+        if fixed is None:
+            genome_type = cipher_type
+            decode = lambda genome: genome
+            new_genome = lambda: self.generate_random_key(cipher_type, key_size)
+        else:
+            # only the free letters/columns evolve, as a permutation of `pool`
+            genome_type = "permutation"
+            decode = lambda genome: self._decode(genome, slots, pool, cipher_type, fixed)
+            new_genome = lambda: self.generate_random_key("permutation", len(pool))
+        state = load_checkpoint(checkpoint_path, "genetic", fingerprint)
+        if state is None:
+            population = [new_genome() for _ in range(self.population_size)]
+            best_key = None
+            best_score = float("-inf")
+            start = 0
+        else:
+            # retoma exatamente: população, melhor chave e estado do RNG
+            population = state["population"]
+            best_key = state["best_key"]
+            best_score = state["best_score"]
+            start = state["generation"]
+            self.rng.setstate(rng_state_from_json(state["rng"]))
         elite_size = max(2, self.population_size // 10)
-        for _ in range(self.generations):
+        for generation in range(start, self.generations):
             scored = []
-            for key in population:
-                cipher = cipher_class(key)
+            for genome in population:
+                cipher = cipher_class(decode(genome))
                 decrypted = cipher.decrypt(ciphertext)
                 score = self.scorer.score(decrypted)
-                scored.append((score, key, decrypted))
+                scored.append((score, genome, decrypted))
             scored.sort(key=lambda x: x[0], reverse=True)
             if scored and scored[0][0] > best_score:
                 best_score = scored[0][0]
-                best_key = scored[0][1]
+                best_key = decode(scored[0][1])
             elite = [k for _, k, _ in scored[:elite_size]]
             new_population = elite[:]
             while len(new_population) < self.population_size:
-                parent1, parent2 = random.sample(elite, 2)
-                child = self.crossover(parent1, parent2, cipher_type)
-                if random.random() < self.mutation_rate:
-                    child = self.mutate(child, cipher_type)
+                parent1, parent2 = self.rng.sample(elite, 2)
+                child = self.crossover(parent1, parent2, genome_type)
+                if self.rng.random() < self.mutation_rate:
+                    child = self.mutate(child, genome_type)
                 new_population.append(child)
             population = new_population
+            if checkpoint_path is not None and (generation + 1) % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, "genetic", fingerprint, {
+                    "generation": generation + 1,
+                    "population": population,
+                    "best_key": best_key,
+                    "best_score": best_score,
+                    "rng": rng_state_to_json(self.rng.getstate()),
+                })
+        clear_checkpoint(checkpoint_path)
+        return best_key
+
+    # ---- population engine: the whole population as an integer matrix ----
+
+    def _layout(self, cipher_type, key_size, fixed=None):
+        # row[i] = index in `pool` of the value stored at key[slots[i]];
+        # entries pinned by cribs (fixed) are left out of both lists
+        fixed = fixed or {}
+        if cipher_type == "permutation":
+            everything = list(range(key_size))
+        else:
+            everything = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        slots = [x for x in everything if x not in fixed]
+        pool = [x for x in everything if x not in fixed.values()]
+        return slots, pool
+
+    def _decode(self, row, slots, pool, cipher_type, fixed=None):
+        if cipher_type == "permutation":
+            if not fixed:
+                return [pool[i] for i in row]
+            key = [None] * (len(slots) + len(fixed))
+            for slot, value in fixed.items():
+                key[slot] = value
+            for slot, i in zip(slots, row):
+                key[slot] = pool[i]
+            return key
+        key = dict(fixed) if fixed else {}
+        key.update((slot, pool[i]) for slot, i in zip(slots, row))
+        return key
+
+    def breed_population(self, elite, n_children, rng):
+        n, k = n_children, elite.shape[1]
+        rows = np.arange(n)[:, None]
+        cols = np.arange(k)
+
+        first = rng.integers(0, len(elite), size=n)
+        second = (first + rng.integers(1, len(elite), size=n)) % len(elite)
+        p1, p2 = elite[first], elite[second]
+
+        # order crossover: segment [lo, hi] from p1, the rest in p2's order
+        a = rng.integers(0, k, size=n)
+        b = rng.integers(0, k - 1, size=n)
+        b = b + (b >= a)
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        in_segment = (cols >= lo[:, None]) & (cols <= hi[:, None])
+        pos_in_p1 = np.empty_like(p1)
+        pos_in_p1[rows, p1] = cols
+        keep = ~in_segment[rows, pos_in_p1[rows, p2]]
+        src = np.argsort(~keep, axis=1, kind="stable")
+        dst = np.argsort(in_segment, axis=1, kind="stable")
+        children = np.empty_like(p1)
+        children[rows, dst] = p2[rows, src]
+        children[in_segment] = p1[in_segment]
+
+        # swap mutation on a random subset of rows
+        mutated = np.nonzero(rng.random(n) < self.mutation_rate)[0]
+        a = rng.integers(0, k, size=len(mutated))
+        b = rng.integers(0, k - 1, size=len(mutated))
+        b = b + (b >= a)
+        tmp = children[mutated, a]
+        children[mutated, a] = children[mutated, b]
+        children[mutated, b] = tmp
+        return children
+
+    def _search_numpy(self, ciphertext, cipher_class, cipher_type, checkpoint=(None, 10),
+                      key_size=None, fixed=None):
+        checkpoint_path, checkpoint_every = checkpoint
+        fingerprint = job_fingerprint(ciphertext, cipher_type, self.population_size,
+                                      self.mutation_rate, self.generations, "numpy",
+                                      sorted(fixed.items()) if fixed else None)
+        slots, pool = self._layout(cipher_type, key_size, fixed)
+        state = load_checkpoint(checkpoint_path, "genetic", fingerprint)
+        if state is None:
+            seed = self.seed if self.seed is not None else self.rng.getrandbits(64)
+            rng = np.random.default_rng(seed)
+            base = np.tile(np.arange(len(pool)), (self.population_size, 1))
+            population = rng.permuted(base, axis=1)
+            best_key = None
+            best_score = float("-inf")
+            start = 0
+        else:
+            rng = np.random.default_rng()
+            rng.bit_generator.state = state["rng"]
+            population = np.array(state["population"], dtype=np.int64)
+            best_key = state["best_key"]
+            best_score = state["best_score"]
+            start = state["generation"]
+        elite_size = max(2, self.population_size // 10)
+        for generation in range(start, self.generations):
+            keys = [self._decode(row, slots, pool, cipher_type, fixed) for row in population.tolist()]
+            scores = np.array([self.scorer.score(cipher_class(key).decrypt(ciphertext)) for key in keys])
+            order = np.argsort(-scores, kind="stable")
+            if scores[order[0]] > best_score:
+                best_score = float(scores[order[0]])
+                best_key = keys[order[0]]
+            elite = population[order[:elite_size]]
+            children = self.breed_population(elite, self.population_size - len(elite), rng)
+            population = np.vstack([elite, children])
+            if checkpoint_path is not None and (generation + 1) % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, "genetic", fingerprint, {
+                    "generation": generation + 1,
+                    "population": population.tolist(),
+                    "best_key": best_key,
+                    "best_score": best_score,
+                    "rng": rng.bit_generator.state,
+                })
+        clear_checkpoint(checkpoint_path)
         return best_key
@@ -1,8 +1,12 @@
 import string
 import random
+import warnings
 import unicodedata
 from collections import Counter
 
+import acelerado
+from checkpoint import job_fingerprint, save_checkpoint, load_checkpoint, clear_checkpoint
+
 # =====================================================
 # 0. CONFIGURAÇÃO GERAL
 # =====================================================
@@ -40,10 +44,13 @@ def letter_frequencies(text: str) -> Counter:
     letters = [c for c in text if c in ALPHABET]
     return Counter(letters)
 
-def initial_key_guess(ciphertext: str) -> dict:
+def initial_key_guess(ciphertext: str, freq_order: str = ENGLISH_FREQ_ORDER,
+                      fixed: dict = None) -> dict:
     """
     Gera um chute inicial de chave para substituição monoalfabética,
-    baseado em frequências de letras do texto e do inglês.
+    baseado em frequências de letras do texto e do idioma (padrão: inglês).
+    Letras já fixadas (fixed, por exemplo vindas de cribs) são mantidas
+    e o chute por frequência só preenche o resto.
     Retorna mapping: cipher_letter -> plain_letter.
     """
     freq = letter_frequencies(ciphertext)
@@ -55,12 +62,14 @@ def initial_key_guess(ciphertext: str) -> dict:
         if letter not in cipher_letters_sorted:
             cipher_letters_sorted.append(letter)
 
-    mapping = {}
-    used_plain = set()
+    mapping = dict(fixed) if fixed else {}
+    used_plain = set(mapping.values())
+    free_order = [l for l in freq_order if l not in used_plain]
 
-    for i, cipher_letter in enumerate(cipher_letters_sorted):
-        if i < len(ENGLISH_FREQ_ORDER):
-            plain_letter = ENGLISH_FREQ_ORDER[i]
+    free_cipher = [c for c in cipher_letters_sorted if c not in mapping]
+    for i, cipher_letter in enumerate(free_cipher):
+        if i < len(free_order):
+            plain_letter = free_order[i]
         else:
             # Preenche com qualquer letra ainda não usada
             plain_letter = next(l for l in ALPHABET if l not in used_plain)
@@ -114,28 +123,28 @@ COMMON_BIGRAMS_EN = {
     "SE": 1.1
 }
 
-def score_common_words(text_plain: str) -> float:
+def score_common_words(text_plain: str, common_words=COMMON_WORDS_EN) -> float:
     """
-    Soma quantas vezes aparecem palavras comuns do inglês.
+    Soma quantas vezes aparecem palavras comuns do idioma (padrão: inglês).
     """
     text_padded = f" {text_plain} "
     score = 0.0
-    for w in COMMON_WORDS_EN:
+    for w in common_words:
         score += text_padded.count(w)
     return score
 
-def score_bigrams(text_plain: str) -> float:
+def score_bigrams(text_plain: str, bigrams=COMMON_BIGRAMS_EN) -> float:
     """
-    Soma pesos para bigramas comuns (pares de letras) em inglês.
+    Soma pesos para bigramas comuns (pares de letras) do idioma (padrão: inglês).
     """
     score = 0.0
     filtered = "".join(c for c in text_plain if c in ALPHABET)
     for i in range(len(filtered) - 1):
         bg = filtered[i:i+2]
-        score += COMMON_BIGRAMS_EN.get(bg, 0.0)
+        score += bigrams.get(bg, 0.0)
     return score
 
-def score_vowel_ratio(text_plain: str) -> float:
+def score_vowel_ratio(text_plain: str, target: float = 0.40) -> float:
     """
     Penaliza desvios grandes na proporção de vogais (AEIOU).
     Em inglês, algo em torno de ~0.4 costuma ser razoável.
@@ -146,22 +155,213 @@ def score_vowel_ratio(text_plain: str) -> float:
     if num_letters == 0:
         return 0.0
     ratio = num_vowels / num_letters
-    target = 0.40
     penalty = abs(ratio - target)
-    return -penalty  # quanto mais perto de 0.40, maior o score
+    return -penalty  # quanto mais perto do alvo, maior o score
 
-def score_text(text_plain: str) -> float:
+def score_text(text_plain: str, lang: str = "EN") -> float:
     """
     Combina vários critérios num score único.
     Aqui damos peso bem maior para palavras inteiras.
     """
-    s_words = score_common_words(text_plain)
-    s_bigrams = score_bigrams(text_plain)
-    s_vowels = score_vowel_ratio(text_plain)
+    model = LANGUAGE_MODELS[lang]
+    s_words = score_common_words(text_plain, model["common_words"])
+    s_bigrams = score_bigrams(text_plain, model["bigrams"])
+    s_vowels = score_vowel_ratio(text_plain, model["vowel_target"])
 
     # Pesos ajustados para priorizar palavras completas
     return 10.0 * s_words + 1.0 * s_bigrams + 2.0 * s_vowels
 
+def score_text_languages(text_plain: str, langs) -> dict:
+    """
+    Pontua o mesmo texto em vários idiomas numa passada só:
+    o texto é filtrado e os bigramas/vogais são contados uma única vez,
+    e só as tabelas de cada modelo mudam. Retorna {lang: score}.
+    O valor de cada idioma é igual ao de score_text(text_plain, lang).
+    """
+    text_padded = f" {text_plain} "
+    filtered = "".join(c for c in text_plain if c in ALPHABET)
+    pairs = [filtered[i:i+2] for i in range(len(filtered) - 1)]
+    num_vowels = sum(1 for c in text_plain if c in "AEIOU")
+    num_letters = len(filtered)
+
+    scores = {}
+    for lang in langs:
+        model = LANGUAGE_MODELS[lang]
+        s_words = 0.0
+        for w in model["common_words"]:
+            s_words += text_padded.count(w)
+        s_bigrams = 0.0
+        for bg in pairs:
+            s_bigrams += model["bigrams"].get(bg, 0.0)
+        if num_letters == 0:
+            s_vowels = 0.0
+        else:
+            s_vowels = -abs(num_vowels / num_letters - model["vowel_target"])
+        scores[lang] = 10.0 * s_words + 1.0 * s_bigrams + 2.0 * s_vowels
+    return scores
+
+# =====================================================
+# 4.1 MODELOS DE IDIOMA (REGISTRO EN / PT / ES)
+# =====================================================
+
+# Cada modelo guarda: probabilidades de letras, ordem de frequência,
+# índice de coincidência esperado, palavras comuns, bigramas e alvo de vogais.
+LANGUAGE_MODELS = {}
+
+def register_language_model(code: str,
+                            letter_freqs: dict,
+                            common_words,
+                            bigrams: dict,
+                            vowel_target: float,
+                            freq_order: str = None):
+    """
+    Registra (ou substitui) um modelo de idioma no registro global.
+    letter_freqs: letra -> frequência (qualquer escala, é normalizada).
+    Se freq_order não for dado, é derivado de letter_freqs.
+    """
+    total = sum(letter_freqs.values())
+    probs = {l: letter_freqs.get(l, 0.0) / total for l in ALPHABET}
+    if freq_order is None:
+        freq_order = "".join(sorted(ALPHABET, key=lambda l: -probs[l]))
+    LANGUAGE_MODELS[code] = {
+        "letter_probs": probs,
+        "freq_order": freq_order,
+        "ioc": sum(p * p for p in probs.values()),
+        "common_words": list(common_words),
+        "word_set": set(w.strip() for w in common_words),
+        "bigrams": dict(bigrams),
+        "vowel_target": vowel_target,
+    }
+    return LANGUAGE_MODELS[code]
+
+ENGLISH_LETTER_FREQS = {
+    "E": 12.70, "T": 9.06, "A": 8.17, "O": 7.51, "I": 6.97, "N": 6.75,
+    "S": 6.33, "H": 6.09, "R": 5.99, "D": 4.25, "L": 4.03, "C": 2.78,
+    "U": 2.76, "M": 2.41, "W": 2.36, "F": 2.23, "G": 2.02, "Y": 1.97,
+    "P": 1.93, "B": 1.29, "V": 0.98, "K": 0.77, "J": 0.15, "X": 0.15,
+    "Q": 0.10, "Z": 0.07
+}
+
+# Frequências do português sem acentos (Ç vira C, Ã vira A etc.)
+PORTUGUESE_LETTER_FREQS = {
+    "A": 14.63, "E": 12.57, "O": 10.73, "S": 7.81, "R": 6.53, "I": 6.18,
+    "N": 5.05, "D": 4.99, "M": 4.74, "U": 4.63, "T": 4.34, "C": 3.88,
+    "L": 2.78, "P": 2.52, "V": 1.67, "G": 1.30, "H": 1.28, "Q": 1.20,
+    "B": 1.04, "F": 1.02, "Z": 0.47, "J": 0.40, "X": 0.21, "K": 0.02,
+    "W": 0.01, "Y": 0.01
+}
+
+COMMON_WORDS_PT = [
+    " DE ", " A ", " O ", " QUE ", " E ", " DO ", " DA ", " EM ", " UM ",
+    " PARA ", " COM ", " NAO ", " UMA ", " OS ", " NO ", " SE ", " NA ",
+    " POR ", " MAIS ", " AS ", " DOS ", " COMO ", " MAS ", " AO ", " DAS ",
+    " SEU ", " SUA ", " OU ", " QUANDO ", " NOS ", " JA ", " TAMBEM ",
+    " PELO ", " PELA ", " ATE ", " ISSO ", " ENTRE ", " SEM ", " ESSE ",
+    " ESSA ", " VOCE ", " SEUS ", " SUAS ",
+
+    # vocabulário de e-mail corporativo
+    " PREZADOS ", " PREZADO ", " SEGUE ", " ANEXO ", " FAVOR ",
+    " CONFIRMAR ", " DOCUMENTO ", " DOCUMENTOS ", " REUNIAO ",
+    " TREINAMENTO ", " ATENCIOSAMENTE ", " OBRIGADO "
+]
+
+COMMON_BIGRAMS_PT = {
+    "DE": 3.0, "OS": 2.6, "ES": 2.5, "RA": 2.4, "DO": 2.3, "AS": 2.3,
+    "EN": 2.2, "ER": 2.1, "TE": 2.1, "AR": 2.0, "RE": 2.0, "DA": 2.0,
+    "CO": 1.9, "QU": 1.8, "UE": 1.8, "NT": 1.7, "SE": 1.7, "AD": 1.6,
+    "OR": 1.6, "ME": 1.5, "TA": 1.5, "AN": 1.5, "NA": 1.4, "AO": 1.4,
+    "CA": 1.3
+}
+
+# Frequências do espanhol sem acentos (Ñ vira N)
+SPANISH_LETTER_FREQS = {
+    "E": 13.68, "A": 12.53, "O": 8.68, "S": 7.98, "R": 6.87, "N": 6.71,
+    "I": 6.25, "D": 5.86, "L": 4.97, "C": 4.68, "T": 4.63, "U": 3.93,
+    "M": 3.15, "P": 2.51, "B": 1.42, "G": 1.01, "V": 0.90, "Y": 0.90,
+    "Q": 0.88, "H": 0.70, "F": 0.69, "Z": 0.52, "J": 0.44, "X": 0.22,
+    "W": 0.02, "K": 0.01
+}
+
+COMMON_WORDS_ES = [
+    " DE ", " LA ", " QUE ", " EL ", " EN ", " Y ", " A ", " LOS ", " SE ",
+    " DEL ", " LAS ", " UN ", " POR ", " CON ", " NO ", " UNA ", " SU ",
+    " PARA ", " ES ", " AL ", " LO ", " COMO ", " MAS ", " PERO ", " SUS ",
+    " LE ", " SIN ", " SOBRE ", " ESTE ", " YA ", " ENTRE ", " CUANDO ",
+    " ESTA ", " SER ", " SON ", " TAMBIEN ", " MUY ",
+
+    # vocabulário de e-mail corporativo
+    " ESTIMADOS ", " ESTIMADO ", " ADJUNTO ", " FAVOR ", " CONFIRMAR ",
+    " DOCUMENTO ", " DOCUMENTOS ", " REUNION ", " CAPACITACION ",
+    " SALUDOS ", " GRACIAS "
+]
+
+COMMON_BIGRAMS_ES = {
+    "DE": 3.0, "ES": 2.8, "EN": 2.6, "EL": 2.4, "LA": 2.4, "OS": 2.3,
+    "UE": 2.2, "AR": 2.1, "RA": 2.0, "RE": 2.0, "ER": 2.0, "AS": 1.9,
+    "ON": 1.9, "ST": 1.8, "AD": 1.7, "AL": 1.7, "OR": 1.6, "TA": 1.6,
+    "CO": 1.6, "SE": 1.5, "AN": 1.5, "NT": 1.4, "QU": 1.4, "DO": 1.3,
+    "TE": 1.3
+}
+
+register_language_model("EN", ENGLISH_LETTER_FREQS, COMMON_WORDS_EN,
+                        COMMON_BIGRAMS_EN, 0.40, freq_order=ENGLISH_FREQ_ORDER)
+register_language_model("PT", PORTUGUESE_LETTER_FREQS, COMMON_WORDS_PT,
+                        COMMON_BIGRAMS_PT, 0.47)
+register_language_model("ES", SPANISH_LETTER_FREQS, COMMON_WORDS_ES,
+                        COMMON_BIGRAMS_ES, 0.45)
+
+# =====================================================
+# 4.2 DETECÇÃO DE IDIOMA (PRÉ-PASSO ESTATÍSTICO)
+# =====================================================
+
+def index_of_coincidence(text: str) -> float:
+    """
+    Índice de coincidência: probabilidade de duas letras sorteadas
+    do texto serem iguais. Não muda com substituição nem com permutação.
+    """
+    freq = letter_frequencies(text)
+    n = sum(freq.values())
+    if n < 2:
+        return 0.0
+    return sum(c * (c - 1) for c in freq.values()) / (n * (n - 1))
+
+def detect_language(ciphertext: str, langs=None) -> list:
+    """
+    Ordena os idiomas do registro pela distância estatística ao texto.
+    Compara o perfil de frequências ORDENADO (invariante à substituição)
+    e o índice de coincidência. Retorna [(lang, distancia), ...],
+    do mais provável para o menos provável.
+    """
+    if langs is None:
+        langs = list(LANGUAGE_MODELS)
+    text = normalize_ciphertext(ciphertext)
+    freq = letter_frequencies(text)
+    n = sum(freq.values())
+    if n == 0:
+        return [(lang, 0.0) for lang in langs]
+
+    observed = sorted((freq.get(l, 0) / n for l in ALPHABET), reverse=True)
+    ioc = index_of_coincidence(text)
+
+    ranking = []
+    for lang in langs:
+        model = LANGUAGE_MODELS[lang]
+        expected = sorted(model["letter_probs"].values(), reverse=True)
+        profile_dist = sum(abs(o - e) for o, e in zip(observed, expected))
+        ioc_dist = abs(ioc - model["ioc"])
+        ranking.append((lang, profile_dist + 10.0 * ioc_dist))
+    ranking.sort(key=lambda x: x[1])
+    return ranking
+
+def choose_languages(ciphertext: str, langs=None, margin: float = 0.05) -> list:
+    """
+    Escolhe os idiomas a usar na busca: o mais provável e todos os que
+    ficaram a até 'margin' de distância dele (caso ambíguo).
+    """
+    ranking = detect_language(ciphertext, langs)
+    best_dist = ranking[0][1]
+    return [lang for lang, dist in ranking if dist - best_dist <= margin]
+
 # =====================================================
 # 5. (OPCIONAL) CÉSAR / ROT13 - fiz por engano
 # =====================================================
@@ -207,14 +407,18 @@ def score_text(text_plain: str) -> float:
 #    PARA SUBSTITUIÇÃO GERAL
 # =====================================================
 
-def generate_neighbor(mapping: dict) -> dict:
+def generate_neighbor(mapping: dict, free_plain=ALPHABET, rng=random) -> dict:
     """
     Gera uma chave vizinha trocando duas letras no lado plaintext (valores).
+    Só troca letras de free_plain (as fixadas por cribs ficam paradas).
+    rng: o módulo random ou um random.Random próprio da busca.
     """
     new_mapping = mapping.copy()
+    if len(free_plain) < 2:
+        return new_mapping
 
-    # escolhe duas letras de plaintext quaisquer para trocar
-    a, b = random.sample(ALPHABET, 2)
+    # escolhe duas letras de plaintext livres para trocar
+    a, b = rng.sample(free_plain, 2)
 
     # inverte mapping: plain_letter -> cipher_letter
     inv = {v: k for k, v in new_mapping.items()}
@@ -229,40 +433,47 @@ def generate_neighbor(mapping: dict) -> dict:
 
     return new_mapping
 
-def random_mapping() -> dict:
+def random_mapping(fixed: dict = None, rng=random) -> dict:
     """
     Gera uma chave totalmente aleatória (permutação do alfabeto).
+    Com fixed, só as letras não fixadas são sorteadas.
     mapping: cipher_letter -> plain_letter
     """
-    plain_letters = list(ALPHABET)
-    random.shuffle(plain_letters)
-    return {cipher: plain for cipher, plain in zip(ALPHABET, plain_letters)}
+    mapping = dict(fixed) if fixed else {}
+    plain_letters = [l for l in ALPHABET if l not in mapping.values()]
+    rng.shuffle(plain_letters)
+    free_cipher = [c for c in ALPHABET if c not in mapping]
+    mapping.update(zip(free_cipher, plain_letters))
+    return mapping
 
-def hill_climb_single_run(ciphertext: str,
-                          iterations: int = 10000,
-                          use_freq_init: bool = True):
+def make_language_score(langs=("EN",)):
     """
-    Executa uma corrida de hill-climbing com "simulated annealing light".
-    Se use_freq_init=True, começa pela chave baseada em frequência.
-    Se False, começa com chave totalmente aleatória.
-    Retorna (melhor_texto_claro, melhor_mapping, melhor_score).
+    Devolve a função de score usada na busca.
+    Com um idioma só, é o próprio score_text; com vários (caso ambíguo),
+    pontua todos numa passada e fica com o melhor.
     """
-    if use_freq_init:
-        current_mapping = initial_key_guess(ciphertext)
-    else:
-        current_mapping = random_mapping()
+    langs = tuple(langs)
+    if len(langs) == 1:
+        lang = langs[0]
+        return lambda text_plain: score_text(text_plain, lang)
+    return lambda text_plain: max(score_text_languages(text_plain, langs).values())
 
-    current_plain = apply_mapping(ciphertext, current_mapping)
-    current_score = score_text(current_plain)
+def anneal(current_mapping: dict, evaluate, iterations: int, free_plain=ALPHABET, rng=random):
+    """
+    Laço de hill-climbing com "simulated annealing light" sobre uma
+    função evaluate(mapping) -> score qualquer.
+    Todo sorteio sai de rng, então buscas com instâncias próprias de
+    random.Random podem rodar em threads ao mesmo tempo.
+    Retorna (melhor_mapping, melhor_score).
+    """
+    current_score = evaluate(current_mapping)
 
     best_mapping = current_mapping
-    best_plain = current_plain
     best_score = current_score
 
     for i in range(iterations):
-        neighbor_mapping = generate_neighbor(current_mapping)
-        neighbor_plain = apply_mapping(ciphertext, neighbor_mapping)
-        neighbor_score = score_text(neighbor_plain)
+        neighbor_mapping = generate_neighbor(current_mapping, free_plain, rng)
+        neighbor_score = evaluate(neighbor_mapping)
 
         delta = neighbor_score - current_score
 
@@ -274,19 +485,179 @@ def hill_climb_single_run(ciphertext: str,
             T = max(0.1, (iterations - i) / iterations)  # decresce ao longo do tempo
             base_prob = 0.05  # probabilidade base de aceitar piora
             prob = base_prob * T
-            accept = random.random() < prob
+            accept = rng.random() < prob
 
         if accept:
             current_mapping = neighbor_mapping
-            current_plain = neighbor_plain
             current_score = neighbor_score
 
             if current_score > best_score:
                 best_mapping = current_mapping
-                best_plain = current_plain
                 best_score = current_score
 
-    return best_plain, best_mapping, best_score
+    return best_mapping, best_score
+
+def hill_climb_single_run(ciphertext: str,
+                          iterations: int = 10000,
+                          use_freq_init: bool = True,
+                          langs=("EN",),
+                          fixed: dict = None,
+                          rng=random):
+    """
+    Executa uma corrida de hill-climbing com "simulated annealing light".
+    Se use_freq_init=True, começa pela chave baseada em frequência
+    (do primeiro idioma de langs).
+    Se False, começa com chave totalmente aleatória.
+    Com fixed (chave parcial cipher -> plain), a busca só mexe nas
+    letras livres. Os sorteios saem de rng (padrão: o módulo random).
+    Retorna (melhor_texto_claro, melhor_mapping, melhor_score).
+    """
+    score_fn = make_language_score(langs)
+    free_plain = ALPHABET
+    if fixed:
+        free_plain = "".join(l for l in ALPHABET if l not in fixed.values())
+
+    if use_freq_init:
+        current_mapping = initial_key_guess(ciphertext, LANGUAGE_MODELS[langs[0]]["freq_order"], fixed)
+    else:
+        current_mapping = random_mapping(fixed, rng)
+
+    # com numba, o mesmo laço roda compilado (resultado idêntico)
+    result = acelerado.anneal_substitution(
+        ciphertext, current_mapping, [LANGUAGE_MODELS[lang] for lang in langs],
+        iterations, free_plain, rng,
+    )
+    if result is None:
+        result = anneal(
+            current_mapping,
+            lambda mapping: score_fn(apply_mapping(ciphertext, mapping)),
+            iterations,
+            free_plain,
+            rng,
+        )
+    best_mapping, best_score = result
+    return apply_mapping(ciphertext, best_mapping), best_mapping, best_score
+
+# =====================================================
+# 6.1 CRIBS (TRECHOS CONHECIDOS DO TEXTO CLARO)
+# =====================================================
+
+def parse_crib(crib) -> tuple:
+    """
+    Um crib é "PALAVRA" (posição desconhecida) ou ("PALAVRA", posicao),
+    com a posição contada no texto normalizado. Retorna (texto, posicao|None).
+    """
+    if isinstance(crib, str):
+        text, position = crib, None
+    else:
+        text, position = crib
+    return normalize_ciphertext(text), position
+
+def _align_crib(ciphertext: str, word: str, start: int, mapping: dict, used: set):
+    """
+    Tenta encaixar word em ciphertext[start:], estendendo mapping
+    (cipher -> plain) sem contradições. Retorna as letras cifradas
+    adicionadas, ou None (mapping/used voltam ao estado original).
+    """
+    added = []
+    for c, p in zip(ciphertext[start:start + len(word)], word):
+        if p not in ALPHABET or c not in ALPHABET:
+            ok = (c == p)
+        elif c in mapping:
+            ok = (mapping[c] == p)
+        elif p in used:
+            ok = False
+        else:
+            mapping[c] = p
+            used.add(p)
+            added.append(c)
+            ok = True
+        if not ok:
+            for c2 in added:
+                used.discard(mapping.pop(c2))
+            return None
+    return added
+
+def _is_whole_word(ciphertext: str, start: int, end: int) -> bool:
+    """
+    ciphertext[start:end] é uma palavra inteira (entre espaços ou nas
+    pontas do texto)?
+    """
+    return (start == 0 or ciphertext[start - 1] == " ") and \
+        (end == len(ciphertext) or ciphertext[end] == " ")
+
+def _iter_crib_partials(ciphertext: str, parsed, whole_words: bool):
+    """
+    Gera, sob demanda e na ordem do texto, as chaves parciais que encaixam
+    todos os cribs (já passados por parse_crib). Com whole_words, os cribs
+    sem posição só são tentados sobre palavras inteiras.
+    """
+    def solve(ci, mapping, used):
+        if ci == len(parsed):
+            yield dict(mapping)
+            return
+        word, position = parsed[ci]
+        if position is not None:
+            starts = [position]
+        else:
+            starts = range(len(ciphertext) - len(word) + 1)
+        for start in starts:
+            if start < 0 or start + len(word) > len(ciphertext):
+                continue
+            if whole_words and position is None \
+                    and not _is_whole_word(ciphertext, start, start + len(word)):
+                continue
+            added = _align_crib(ciphertext, word, start, mapping, used)
+            if added is None:
+                continue
+            yield from solve(ci + 1, mapping, used)
+            for c in added:
+                used.discard(mapping.pop(c))
+
+    yield from solve(0, {}, set())
+
+def crib_partial_keys(ciphertext: str, cribs, limit: int = None) -> list:
+    """
+    Casa os cribs com o texto cifrado pelo padrão de letras e devolve as
+    chaves parciais (cipher -> plain) compatíveis com todos eles.
+    Cribs com posição e os mais longos são encaixados primeiro, o que
+    corta a árvore de possibilidades bem cedo.
+    Se o texto tem espaços, vêm primeiro os encaixes em palavras inteiras,
+    depois os demais, cada grupo na ordem do texto. A enumeração é
+    preguiçosa: com limit, ela para assim que passa de 'limit' chaves e
+    avisa (warnings) que o resto foi descartado. Sem limit, devolve todas
+    (o que pode explodir com cribs curtos num texto longo).
+    """
+    parsed = sorted((parse_crib(c) for c in cribs),
+                    key=lambda wp: (wp[1] is None, -len(wp[0])))
+    passes = [True, False] if " " in ciphertext else [False]
+    seen = set()
+    results = []
+    for whole_words in passes:
+        for mapping in _iter_crib_partials(ciphertext, parsed, whole_words):
+            frozen = frozenset(mapping.items())
+            if frozen in seen:
+                continue
+            seen.add(frozen)
+            results.append(mapping)
+            if limit is not None and len(results) > limit:
+                warnings.warn(f"more than {limit} partial keys match the cribs; "
+                              f"only the first {limit} (whole words first) are kept",
+                              RuntimeWarning)
+                return results[:limit]
+    return results
+
+def _restart_plan(seed: int, n_partials: int) -> tuple:
+    """
+    Distribui os restarts entre as chaves parciais dos cribs: o restart
+    'seed' usa a parcial seed % n_partials, e o tipo de chute inicial
+    (frequência ou aleatório) alterna a cada volta pelas parciais, então
+    cada parcial recebe os dois tipos qualquer que seja n_partials.
+    Sem cribs (n_partials = 1) é a alternância de sempre: pares com freq.
+    Retorna (indice_da_parcial, use_freq_init).
+    """
+    index, lap = seed % n_partials, seed // n_partials
+    return index, (index + lap) % 2 == 0
 
 # =====================================================
 # 7. GANCHO PARA LLM (HUGGINGFACE
@@ -334,44 +705,236 @@ def choose_best_with_llm(candidates):
 # 8. SUBSTITUIÇÃO GERAL
 # =====================================================
 
+# score mínimo POR LETRA para aceitar uma chave conhecida sem busca
+# (texto claro real fica bem acima de 0.6; chave errada fica perto de 0)
+KNOWN_KEY_THRESHOLD = 0.5
+
+# no máximo quantas chaves parciais dos cribs dividem os restarts
+CRIB_PARTIAL_LIMIT = 8
+
+def break_general_substitution(ciphertext: str,
+                               restarts: int = 50,
+                               iterations: int = 10000,
+                               langs=None,
+                               store=None,
+                               checkpoint_path: str = None,
+                               cribs=None):
+    """
+    Quebra uma cifra de substituição genérica em qualquer idioma do registro.
+    Se langs=None, um pré-passo estatístico (choose_languages) escolhe o(s)
+    idioma(s) provável(is) antes da busca; se houver empate, todos os
+    candidatos são pontuados juntos em cada iteração.
+    Os chutes por frequência alternam entre os idiomas escolhidos.
+    Com store (cache_resultados.ResultStore), consulta antes o cache e as
+    chaves já recuperadas, e grava o resultado no fim.
+    Com checkpoint_path, os restarts concluídos são salvos em disco e uma
+    nova chamada com o mesmo caminho continua do próximo restart (cada
+    restart tem semente própria, então o resultado final é o mesmo).
+    Com cribs (ver crib_partial_keys), as chaves parciais compatíveis são
+    calculadas antes e cada restart só busca as letras livres de uma delas.
+    O orçamento não muda: os mesmos 'restarts' são divididos entre as
+    primeiras min(restarts, CRIB_PARTIAL_LIMIT) parciais, e cada uma
+    recebe ao menos um.
+    Retorna (texto_claro, mapping, score, idioma).
+    """
+    cipher_norm = normalize_ciphertext(ciphertext)
+    if langs is None:
+        langs = choose_languages(cipher_norm)
+    langs = tuple(langs)
+
+    partials = [None]
+    if cribs:
+        partials = crib_partial_keys(cipher_norm, cribs,
+                                     limit=max(1, min(restarts, CRIB_PARTIAL_LIMIT)))
+        if not partials:
+            raise ValueError("cribs do not match the ciphertext under any substitution key")
+
+    def search():
+        fingerprint = job_fingerprint(cipher_norm, restarts, iterations, langs,
+                                      [list(parse_crib(c)) for c in cribs or []])
+        state = load_checkpoint(checkpoint_path, "substitution", fingerprint)
+        candidates = []
+        if state is not None:
+            candidates = [tuple(c) for c in state["candidates"]]
+
+        for seed in range(len(candidates), restarts):
+            # gerador próprio por restart: nada de estado global, então
+            # várias quebras podem rodar em threads sem se atrapalhar
+            rng = random.Random(seed)
+            # metade dos restarts com freq, metade aleatória, em todas as parciais
+            index, use_freq_init = _restart_plan(seed, len(partials))
+            # roda a lista de idiomas para que cada um tenha seu chute inicial
+            k = (seed // 2) % len(langs)
+            plain, mapping, score_h = hill_climb_single_run(
+                cipher_norm,
+                iterations=iterations,
+                use_freq_init=use_freq_init,
+                langs=langs[k:] + langs[:k],
+                fixed=partials[index],
+                rng=rng,
+            )
+            candidates.append((plain, mapping, score_h))
+            if checkpoint_path is not None:
+                save_checkpoint(checkpoint_path, "substitution", fingerprint,
+                                {"candidates": candidates})
+
+        best_plain, best_mapping, best_score = choose_best_with_llm(candidates)
+        clear_checkpoint(checkpoint_path)
+        return best_mapping, best_plain, best_score
+
+    if store is None:
+        best_mapping, best_plain, best_score = search()
+    else:
+        best_mapping, best_plain, best_score = store.get_or_break(
+            cipher_norm, "substitution",
+            decrypt_fn=apply_mapping,
+            score_fn=make_language_score(langs),
+            threshold=KNOWN_KEY_THRESHOLD,
+            search_fn=search,
+        )
+
+    lang_scores = score_text_languages(best_plain, langs)
+    best_lang = max(langs, key=lambda lang: lang_scores[lang])
+    return best_plain, best_mapping, best_score, best_lang
+
 def break_general_substitution_english(ciphertext: str,
                                        restarts: int = 50,
-                                       iterations: int = 10000):
+                                       iterations: int = 10000,
+                                       store=None,
+                                       checkpoint_path: str = None,
+                                       cribs=None):
     """
     Quebra uma cifra de substituição genérica (chave monoalfabética),
     usando hill-climbing "turbinado" com múltiplos recomeços e (opcionalmente) LLM.
     Metade dos restarts começa com chute por frequência,
     metade com chave totalmente aleatória.
     """
-    cipher_norm = normalize_ciphertext(ciphertext)
+    best_plain, best_mapping, best_score, _ = break_general_substitution(
+        ciphertext, restarts=restarts, iterations=iterations, langs=("EN",),
+        store=store, checkpoint_path=checkpoint_path, cribs=cribs
+    )
+    return best_plain, best_mapping, best_score
+
+# =====================================================
+# 8.1 VÁRIAS MENSAGENS COM A MESMA CHAVE
+# =====================================================
+
+def word_pattern(word: str) -> tuple:
+    """
+    Padrão de repetição de letras (THE -> (0, 1, 2), SEE -> (0, 1, 1)).
+    A substituição preserva o padrão, então só palavras cifradas com o
+    padrão de alguma palavra comum podem virar essa palavra.
+    """
+    first_seen = {}
+    return tuple(first_seen.setdefault(c, len(first_seen)) for c in word)
 
-    candidates = []
+def pooled_statistics(ciphertexts, langs=("EN",)) -> dict:
+    """
+    Junta as contagens de todas as mensagens (já no espaço cifrado):
+    letras, bigramas (sem cruzar a fronteira entre mensagens) e palavras
+    cujo padrão bate com alguma palavra comum dos idiomas.
+    O custo de pontuar uma chave depois disso não depende do número de
+    mensagens: no máximo 26 letras, 676 bigramas e as palavras candidatas.
+    """
+    letters = Counter()
+    bigrams = Counter()
+    words = Counter()
+    for text in ciphertexts:
+        filtered = "".join(c for c in text if c in ALPHABET)
+        letters.update(filtered)
+        bigrams.update(filtered[i:i+2] for i in range(len(filtered) - 1))
+        words.update(text.split())
+
+    patterns = set()
+    for lang in langs:
+        patterns.update(word_pattern(w) for w in LANGUAGE_MODELS[lang]["word_set"])
+    return {
+        "letters": list(letters.items()),
+        "bigrams": list(bigrams.items()),
+        "words": [(w, n) for w, n in words.items() if word_pattern(w) in patterns],
+    }
+
+def score_pooled(stats: dict, mapping: dict, lang: str = "EN") -> float:
+    """
+    Mesmo critério de score_text (palavras, bigramas, vogais), calculado
+    sobre as contagens agregadas em vez de decifrar cada mensagem.
+    """
+    model = LANGUAGE_MODELS[lang]
+    word_set = model["word_set"]
+    weights = model["bigrams"]
+
+    s_words = 0.0
+    for word, n in stats["words"]:
+        if "".join(mapping[c] for c in word) in word_set:
+            s_words += n
+
+    s_bigrams = 0.0
+    for bg, n in stats["bigrams"]:
+        s_bigrams += n * weights.get(mapping[bg[0]] + mapping[bg[1]], 0.0)
+
+    num_letters = 0
+    num_vowels = 0
+    for c, n in stats["letters"]:
+        num_letters += n
+        if mapping[c] in "AEIOU":
+            num_vowels += n
+    s_vowels = 0.0
+    if num_letters:
+        s_vowels = -abs(num_vowels / num_letters - model["vowel_target"])
+
+    return 10.0 * s_words + 1.0 * s_bigrams + 2.0 * s_vowels
+
+def break_substitution_same_key(ciphertexts,
+                                restarts: int = 50,
+                                iterations: int = 10000,
+                                langs=None):
+    """
+    Ataque conjunto a várias mensagens curtas cifradas com a MESMA chave.
+    Uma única busca (mesmos restarts do break_general_substitution) é
+    pontuada pelas estatísticas agregadas de todas as mensagens, e a chave
+    recuperada é aplicada a cada uma.
+    Retorna ([textos_claros], mapping, score, idioma).
+    """
+    cipher_norms = [normalize_ciphertext(c) for c in ciphertexts]
+    joined = " ".join(cipher_norms)
+    if langs is None:
+        langs = choose_languages(joined)
+    langs = tuple(langs)
+    stats = pooled_statistics(cipher_norms, langs)
+
+    def evaluate(mapping):
+        return max(score_pooled(stats, mapping, lang) for lang in langs)
+
+    best_mapping, best_score = None, float("-inf")
     for seed in range(restarts):
-        random.seed(seed)
-        # metade dos restarts com freq, metade aleatória
-        use_freq_init = (seed % 2 == 0)
-        plain, mapping, score_h = hill_climb_single_run(
-            cipher_norm,
-            iterations=iterations,
-            use_freq_init=use_freq_init
-        )
-        candidates.append((plain, mapping, score_h))
+        rng = random.Random(seed)
+        if seed % 2 == 0:
+            k = (seed // 2) % len(langs)
+            start = initial_key_guess(joined, LANGUAGE_MODELS[langs[k]]["freq_order"])
+        else:
+            start = random_mapping(rng=rng)
+        mapping, score = anneal(start, evaluate, iterations, rng=rng)
+        if score > best_score:
+            best_mapping, best_score = mapping, score
 
-    best_plain, best_mapping, best_score = choose_best_with_llm(candidates)
-    return best_plain, best_mapping, best_score
+    best_lang = max(langs, key=lambda lang: score_pooled(stats, best_mapping, lang))
+    plains = [apply_mapping(c, best_mapping) for c in cipher_norms]
+    return plains, best_mapping, best_score, best_lang
 
 # =====================================================
 # 9. INTERFACE SIMPLES DE LINHA DE COMANDO
 # =====================================================
 
 if __name__ == "__main__":
-    print("=== BREAKING MONOALPHABETIC SUBSTITUTION CIPHER (ENGLISH) ===")
+    print("=== BREAKING MONOALPHABETIC SUBSTITUTION CIPHER (EN / PT / ES) ===")
     print("Paste the ciphertext on a single line and press Enter:")
     cipher = input("> ")
 
-    gen_plain, gen_mapping, gen_score = break_general_substitution_english(cipher)
+    print(f"Language guess: {choose_languages(cipher)}")
+    gen_plain, gen_mapping, gen_score, gen_lang = break_general_substitution(cipher)
 
     print("\n=== ASSUMING GENERAL SUBSTITUTION CIPHER ===")
+    print(f"Language: {gen_lang}")
     print(f"Score: {gen_score}")
     print("\nPlaintext candidate:\n")
     print(gen_plain)
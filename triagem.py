@@ -0,0 +1,190 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from quebra_substituicao import (
+    ALPHABET,
+    LANGUAGE_MODELS,
+    normalize_ciphertext,
+    letter_frequencies,
+    index_of_coincidence,
+    detect_language,
+    score_text,
+    break_general_substitution,
+)
+from permutacao_livre import (
+    PermutationCipher,
+    GeneticBreaker,
+    scorer_for_languages,
+)
+
+# =====================================================
+# 1. ESTATÍSTICAS PARA TRIAGEM
+# =====================================================
+
+# Limiar de IoC entre "monoalfabético" (idioma natural, ~0.065-0.078)
+# e "aleatório" (1/26 ~ 0.038).
+MONO_IOC_THRESHOLD = 0.052
+
+# Excesso de distância (direta - ordenada) a partir do qual as letras
+# foram trocadas por outras, ou seja, o texto não é só uma transposição.
+SUBSTITUTION_EXCESS_THRESHOLD = 0.40
+
+def _logistic(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-x))
+
+def frequency_distances(ciphertext: str, langs=None) -> dict:
+    """
+    Mede, para cada idioma do registro:
+      - distância direta: perfil de letras do texto x perfil do idioma,
+        letra a letra (a transposição preserva essa estatística);
+      - distância ordenada: os dois perfis ordenados (invariante também
+        à substituição).
+    Retorna {idioma: (distancia_direta, distancia_ordenada)}.
+    """
+    if langs is None:
+        langs = list(LANGUAGE_MODELS)
+    text = normalize_ciphertext(ciphertext)
+    freq = letter_frequencies(text)
+    n = sum(freq.values())
+    if n == 0:
+        return {lang: (0.0, 0.0) for lang in langs}
+
+    observed = {l: freq.get(l, 0) / n for l in ALPHABET}
+    observed_sorted = sorted(observed.values(), reverse=True)
+
+    distances = {}
+    for lang in langs:
+        probs = LANGUAGE_MODELS[lang]["letter_probs"]
+        direct = sum(abs(observed[l] - probs[l]) for l in ALPHABET)
+        expected = sorted(probs.values(), reverse=True)
+        ordered = sum(abs(o - e) for o, e in zip(observed_sorted, expected))
+        distances[lang] = (direct, ordered)
+    return distances
+
+# =====================================================
+# 2. CLASSIFICADOR DE FAMÍLIA DE CIFRA
+# =====================================================
+
+def classify_cipher(ciphertext: str, langs=None) -> tuple:
+    """
+    Classifica a família da cifra sem rodar nenhuma busca:
+      - IoC perto do aleatório -> "unknown" (polialfabética ou lixo);
+      - frequências de letras iguais às do idioma -> "permutation";
+      - mesmas frequências, mas em outras letras -> "substitution".
+    Retorna (familia, confianca_0_a_1, idioma_provavel).
+    """
+    text = normalize_ciphertext(ciphertext)
+    ioc = index_of_coincidence(text)
+    p_mono = _logistic((ioc - MONO_IOC_THRESHOLD) / 0.004)
+
+    distances = frequency_distances(text, langs)
+    # a família sai do menor excesso (direta - ordenada) entre os idiomas;
+    # o idioma de uma transposição é o de menor distância direta
+    excess = min(direct - ordered for direct, ordered in distances.values())
+    lang = min(distances, key=lambda l: distances[l][0])
+    p_sub = _logistic((excess - SUBSTITUTION_EXCESS_THRESHOLD) / 0.08)
+
+    if p_mono < 0.5:
+        return "unknown", 1.0 - p_mono, lang
+    if p_sub >= 0.5:
+        # letras trocadas: o idioma vem do perfil ordenado + IoC
+        lang = detect_language(text, langs)[0][0]
+        return "substitution", p_mono * p_sub, lang
+    return "permutation", p_mono * (1.0 - p_sub), lang
+
+# =====================================================
+# 3. ROTEAMENTO PARA O MOTOR CERTO
+# =====================================================
+
+def _run_permutation(ciphertext, lang, scorer, ga_params, seed=None):
+    if scorer is None:
+        scorer = scorer_for_languages([lang])
+    if seed is not None:
+        ga_params = dict(ga_params, seed=seed)
+    breaker = GeneticBreaker(scorer, **ga_params)
+    key = breaker.break_cipher(ciphertext, PermutationCipher)
+    return key, PermutationCipher(key).decrypt(ciphertext)
+
+def _run_substitution(ciphertext, restarts, iterations):
+    # langs=None: choose_languages mantém todos os idiomas empatados na busca
+    plain, mapping, _, lang = break_general_substitution(
+        ciphertext, restarts=restarts, iterations=iterations, langs=None
+    )
+    return mapping, plain, lang
+
+def break_unknown_cipher(ciphertext: str,
+                         scorer=None,
+                         min_confidence: float = 0.6,
+                         restarts: int = 50,
+                         iterations: int = 10000,
+                         ga_params=None,
+                         seed=None):
+    """
+    Triagem + quebra: classifica a cifra e manda o trabalho só para o
+    motor correspondente (GeneticBreaker para permutação, hill-climbing
+    para substituição). Se a confiança ficar abaixo de min_confidence,
+    roda os dois motores e fica com o texto de maior score_text.
+    Um texto classificado com confiança como "unknown" (IoC de texto
+    aleatório/polialfabético) não passa por nenhuma busca: volta como
+    ("unknown", None, None, confianca).
+    seed fixa o gerador do GeneticBreaker (o hill-climbing já usa uma
+    semente por restart).
+    Retorna (familia, chave, texto_claro, confianca).
+    """
+    if ga_params is None:
+        ga_params = {}
+    family, confidence, lang = classify_cipher(ciphertext)
+
+    if confidence >= min_confidence and family == "permutation":
+        key, plain = _run_permutation(ciphertext, lang, scorer, ga_params, seed)
+        return family, key, plain, confidence
+    if confidence >= min_confidence and family == "substitution":
+        key, plain, _ = _run_substitution(ciphertext, restarts, iterations)
+        return family, key, plain, confidence
+    if confidence >= min_confidence and family == "unknown":
+        # nenhum dos dois ataques monoalfabéticos serve
+        return family, None, None, confidence
+
+    # triagem inconclusiva: mesmo comportamento de antes (os dois ataques)
+    perm_key, perm_plain = _run_permutation(ciphertext, lang, scorer, ga_params, seed)
+    sub_key, sub_plain, sub_lang = _run_substitution(ciphertext, restarts, iterations)
+    perm_score = score_text(normalize_ciphertext(perm_plain), lang)
+    sub_score = score_text(sub_plain, sub_lang)
+    if perm_score >= sub_score:
+        return "permutation", perm_key, perm_plain, confidence
+    return "substitution", sub_key, sub_plain, confidence
+
+# =====================================================
+# 4. VÁRIOS TEXTOS (POOL DE THREADS OU DE PROCESSOS)
+# =====================================================
+
+def _break_job(args):
+    ciphertext, seed, kwargs = args
+    return break_unknown_cipher(ciphertext, seed=seed, **kwargs)
+
+def break_many(ciphertexts, workers: int = None, mode: str = "thread",
+               seed: int = 0, **kwargs) -> list:
+    """
+    Roda break_unknown_cipher em vários textos (kwargs vão para ela).
+    mode="thread" usa um pool de threads no próprio processo: sem subir
+    processos nem serializar textos e avaliadores. Os motores não usam
+    estado global (cada busca tem seu random.Random), então as threads
+    não interferem umas nas outras; o ganho de tempo vem do kernel
+    compilado, que solta o GIL, ou de um CPython free-threaded.
+    mode="process" usa um ProcessPoolExecutor.
+    O texto i usa a semente seed + i: o resultado não depende do modo
+    nem do número de workers.
+    Retorna a lista de (familia, chave, texto_claro, confianca), na
+    ordem dos textos.
+    """
+    if mode not in ("thread", "process"):
+        raise ValueError(f"unknown mode {mode!r}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tasks = [(c, seed + i, kwargs) for i, c in enumerate(ciphertexts)]
+    if workers <= 1:
+        return list(map(_break_job, tasks))
+    executor = ThreadPoolExecutor if mode == "thread" else ProcessPoolExecutor
+    with executor(max_workers=workers) as pool:
+        return list(pool.map(_break_job, tasks))
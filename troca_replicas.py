@@ -0,0 +1,142 @@
+import math
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from quebra_substituicao import (
+    normalize_ciphertext,
+    choose_languages,
+    initial_key_guess,
+    random_mapping,
+    generate_neighbor,
+    apply_mapping,
+    make_language_score,
+    LANGUAGE_MODELS,
+)
+from memoria_compartilhada import SharedTables, worker_pool, shared_ciphertext
+
+# =====================================================
+# 1. ESCADA DE TEMPERATURAS
+# =====================================================
+
+def temperature_ladder(n_chains: int = 8, t_min: float = 0.5, t_max: float = 20.0) -> list:
+    """
+    Temperaturas em progressão geométrica, da mais fria (busca local,
+    parecida com o hill-climbing) à mais quente (quase passeio aleatório).
+    """
+    if n_chains == 1:
+        return [t_min]
+    ratio = (t_max / t_min) ** (1.0 / (n_chains - 1))
+    return [t_min * ratio ** i for i in range(n_chains)]
+
+# =====================================================
+# 2. UM TRECHO DE METROPOLIS (RODA NO WORKER)
+# =====================================================
+
+def metropolis_segment(args) -> tuple:
+    """
+    Roda 'steps' passos de Metropolis numa cadeia à temperatura dada,
+    usando generate_neighbor e score_text (via make_language_score).
+    args = (ciphertext, langs, mapping, score, temperature, steps, seed);
+    num pool, ciphertext é o índice do texto em memória compartilhada.
+    Retorna (mapping, score, melhor_mapping, melhor_score).
+    """
+    ciphertext, langs, mapping, score, temperature, steps, seed = args
+    if isinstance(ciphertext, int):
+        ciphertext = shared_ciphertext(ciphertext)
+    rng = random.Random(seed)
+    score_fn = make_language_score(langs)
+
+    best_mapping, best_score = mapping, score
+    for _ in range(steps):
+        neighbor = generate_neighbor(mapping, rng=rng)
+        neighbor_score = score_fn(apply_mapping(ciphertext, neighbor))
+        delta = neighbor_score - score
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            mapping, score = neighbor, neighbor_score
+            if score > best_score:
+                best_mapping, best_score = mapping, score
+    return mapping, score, best_mapping, best_score
+
+# =====================================================
+# 3. PARALLEL TEMPERING (TROCA DE RÉPLICAS)
+# =====================================================
+
+def parallel_tempering(ciphertext: str,
+                       temperatures=None,
+                       rounds: int = 100,
+                       steps_per_round: int = 200,
+                       workers: int = None,
+                       langs=None,
+                       seed: int = 0,
+                       mode: str = "process"):
+    """
+    Várias cadeias, uma por temperatura, evoluem em paralelo (uma tarefa
+    por cadeia a cada rodada, distribuídas entre 'workers' processos).
+    Ao fim de cada rodada, cadeias vizinhas na escada tentam trocar de
+    estado com a probabilidade de Metropolis da troca, então boas chaves
+    achadas nas cadeias quentes descem para as frias.
+    As sementes dependem só de (seed, rodada, cadeia): o resultado é o
+    mesmo com qualquer número de workers. O texto cifrado é publicado
+    uma vez em memória compartilhada, não a cada tarefa.
+    mode="thread" usa um pool de threads no mesmo processo (cada cadeia
+    tem seu próprio random.Random, então o resultado é o mesmo).
+    Retorna (melhor_texto_claro, melhor_mapping, melhor_score).
+    """
+    if mode not in ("process", "thread"):
+        raise ValueError(f"unknown mode {mode!r}")
+    cipher_norm = normalize_ciphertext(ciphertext)
+    if langs is None:
+        langs = choose_languages(cipher_norm)
+    langs = tuple(langs)
+    if temperatures is None:
+        temperatures = temperature_ladder()
+    n = len(temperatures)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    rng = random.Random(seed)
+    score_fn = make_language_score(langs)
+    mappings = [initial_key_guess(cipher_norm, LANGUAGE_MODELS[langs[0]]["freq_order"])]
+    for _ in range(n - 1):
+        mappings.append(random_mapping(rng=random.Random(rng.getrandbits(32))))
+    scores = [score_fn(apply_mapping(cipher_norm, m)) for m in mappings]
+
+    best_index = max(range(n), key=lambda i: scores[i])
+    best_mapping, best_score = mappings[best_index], scores[best_index]
+
+    tables, pool = None, None
+    if workers > 1 and mode == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers)
+    elif workers > 1:
+        tables = SharedTables([cipher_norm])
+        pool = worker_pool(tables, workers)
+    run = pool.map if pool is not None else map
+    cipher_ref = 0 if tables is not None else cipher_norm
+    try:
+        for r in range(rounds):
+            tasks = [
+                (cipher_ref, langs, mappings[i], scores[i], temperatures[i],
+                 steps_per_round, seed * 1_000_003 + r * n + i)
+                for i in range(n)
+            ]
+            results = run(metropolis_segment, tasks)
+            for i, (mapping, score, chain_best, chain_best_score) in enumerate(results):
+                mappings[i], scores[i] = mapping, score
+                if chain_best_score > best_score:
+                    best_mapping, best_score = chain_best, chain_best_score
+
+            # trocas entre vizinhos (pares/ímpares alternados a cada rodada)
+            for i in range(r % 2, n - 1, 2):
+                j = i + 1
+                log_accept = (scores[j] - scores[i]) * (1.0 / temperatures[i] - 1.0 / temperatures[j])
+                if log_accept >= 0 or rng.random() < math.exp(log_accept):
+                    mappings[i], mappings[j] = mappings[j], mappings[i]
+                    scores[i], scores[j] = scores[j], scores[i]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if tables is not None:
+            tables.close()
+
+    return apply_mapping(cipher_norm, best_mapping), best_mapping, best_score